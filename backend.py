@@ -1,33 +1,105 @@
 
 from abc import ABC, abstractmethod
-import copy
-import pickle
+import json
+import random
 from exceptions import *
 
+def _zobrist_table(cells, seed=20240601):
+    # 固定种子，保证不同进程 (如读档后) 得到相同的哈希值
+    rng = random.Random(seed)
+    return [(0, rng.getrandbits(64), rng.getrandbits(64)) for _ in range(cells)]
+
+# Zobrist 随机数表：_ZOBRIST[idx][color]，覆盖最大 19 路棋盘
+_ZOBRIST = _zobrist_table(19 * 19)
+
+# 围棋相邻点：上下左右
+_NEIGHBORS4 = ((-1, 0), (1, 0), (0, -1), (0, 1))
+# 五子棋连线方向：横、竖、左斜、右斜
+_LINE_DIRECTIONS = ((0, 1), (1, 0), (1, 1), (1, -1))
+
+# bytes.translate 用的映射表：某一方的棋子映射为 1，其余为 0
+_STONE_TABLES = {p: bytes(int(v == p) for v in range(256)) for p in (1, 2)}
+
+# 存档格式版本；棋盘在存档中记为 "0"/"1"/"2" 组成的字符串
+SAVE_VERSION = 1
+_GRID_TO_TEXT = bytes.maketrans(b"\x00\x01\x02", b"012")
+_TEXT_TO_GRID = bytes.maketrans(b"012", b"\x00\x01\x02")
+
 class Board:
     # 棋盘类：只负责存储数据
     def __init__(self, size):
         self.size = size
         # 0: 空, 1: 黑, 2: 白
-        self.grid = [[0 for _ in range(size)] for _ in range(size)]
+        # 一维缓冲区，坐标 (x, y) 对应下标 x * size + y
+        self.grid = bytearray(size * size)
+
+    def __setstate__(self, state):
+        # 兼容旧存档：二维列表棋盘转换为一维缓冲区
+        grid = state['grid']
+        if isinstance(grid, list):
+            state['grid'] = bytearray(c for row in grid for c in row)
+        self.__dict__.update(state)
 
     def is_valid(self, x, y):
         return 0 <= x < self.size and 0 <= y < self.size
 
     def count_stones(self):
-        black = sum(row.count(1) for row in self.grid)
-        white = sum(row.count(2) for row in self.grid)
+        black = self.grid.count(1)
+        white = self.grid.count(2)
         return black, white
 
+def _diffs_from_snapshots(snapshots, board, current_player):
+    # 由旧存档的整盘快照序列 (含当前棋盘) 推导出逐步差分
+    size = board.size
+    frames = [snap if isinstance(snap, bytes) else bytes(c for row in snap for c in row)
+              for snap in snapshots]
+    frames.append(bytes(board.grid))
+
+    # 每一步都交换行动方，据此倒推第一步的行动方
+    player = 3 - current_player if len(snapshots) % 2 else current_player
+    history = []
+    for before, after in zip(frames, frames[1:]):
+        placed = None
+        captured = []
+        for i, (a, b) in enumerate(zip(before, after)):
+            if a == b:
+                continue
+            if a == 0:
+                placed = divmod(i, size)
+            else:
+                captured.append(divmod(i, size))
+        if placed is None:
+            history.append(("pass", player))
+        else:
+            history.append(("move", placed[0], placed[1], player, tuple(captured)))
+        player = 3 - player
+    return history
+
 class GameBase(ABC):
     # 抽象游戏基类
+    game_type = None # 存档中记录的游戏类型名，由子类指定
+
     def __init__(self, size=15):
         # 限制棋盘大小 
         if not (8 <= size <= 19):
             raise ValueError("棋盘大小必须在 8-19 之间")
         self.board = Board(size)
         self.current_player = 1 # 1: Black, 2: White
-        self.history = [] # 存储历史快照用于悔棋和劫争判断
+        # 逐步记录差分用于悔棋和劫争判断:
+        # ("move", x, y, player, captured) 或 ("pass", player)，captured 为被提子坐标元组
+        self.history = []
+        self.last_move = None # 最近一次落子坐标，None 表示未知 (如读取旧存档后)
+        self.empty_count = size * size # 剩余空位数，用于 O(1) 判断棋盘是否已满
+
+    def __setstate__(self, state):
+        # 兼容旧存档：整盘快照形式的历史转换为差分，并补齐新增字段
+        history = state['history']
+        if history and not isinstance(history[0][0], str):
+            state['history'] = _diffs_from_snapshots(history, state['board'], state['current_player'])
+        state.setdefault('last_move', None)
+        if 'empty_count' not in state:
+            state['empty_count'] = state['board'].grid.count(0)
+        self.__dict__.update(state)
 
     @abstractmethod
     def check_rules(self, x, y, player):
@@ -43,124 +115,295 @@ class GameBase(ABC):
         通用落子逻辑 (五子棋直接使用，围棋需重写以处理提子)
         """
         # 基础检查
-        if not self.board.is_valid(x, y):
+        board = self.board
+        player = self.current_player
+        if not board.is_valid(x, y):
             raise InvalidMoveError("坐标超出棋盘范围")
-        if self.board.grid[x][y] != 0:
+        idx = x * board.size + y
+        if board.grid[idx] != 0:
             raise InvalidMoveError("此处已有棋子")
         
         # 规则检查
-        self.check_rules(x, y, self.current_player)
+        self.check_rules(x, y, player)
 
-        # 保存快照
-        self.history.append(copy.deepcopy(self.board.grid))
+        # 记录差分
+        self.history.append(("move", x, y, player, ()))
 
         # 执行落子
-        self.board.grid[x][y] = self.current_player
-        
+        board.grid[idx] = player
+        self.last_move = (x, y)
+        self.empty_count -= 1
 
-        self.current_player = 3 - self.current_player
+        self.current_player = 3 - player
 
     def undo(self): 
         if not self.history:
             raise GameStateError("无棋可悔")
         
-        # 恢复上一步状态
-        prev_grid = self.history.pop()
-        self.board.grid = prev_grid
-        self.current_player = 3 - self.current_player
+        # 按差分反向恢复上一步状态
+        entry = self.history.pop()
+        if entry[0] == "move":
+            _, x, y, player, captured = entry
+            grid = self.board.grid
+            size = self.board.size
+            grid[x * size + y] = 0
+            for cx, cy in captured:
+                grid[cx * size + cy] = 3 - player
+            self.empty_count += 1 - len(captured)
+        else:
+            player = entry[1]
+        self.current_player = player
+
+        last = self.history[-1] if self.history else None
+        self.last_move = (last[1], last[2]) if last and last[0] == "move" else None
 
     def save_game(self, filepath):
         try:
+            data = json.dumps(self.to_snapshot(), separators=(',', ':')).encode('utf-8')
             with open(filepath, 'wb') as f:
-                pickle.dump(self, f)
+                f.write(data)
         except Exception as e:
             raise GameStateError(f"保存失败: {str(e)}")
 
+    def to_snapshot(self):
+        """导出带版本号的存档快照 (可直接 JSON 序列化)，只包含必要状态"""
+        return {
+            "version": SAVE_VERSION,
+            "type": self.game_type,
+            "size": self.board.size,
+            "grid": self.board.grid.translate(_GRID_TO_TEXT).decode('ascii'),
+            "current_player": self.current_player,
+            "last_move": self.last_move,
+            "history": self.history,
+        }
+
+    @staticmethod
+    def from_snapshot(data):
+        """由 to_snapshot 导出的快照重建游戏对象"""
+        if data.get("version") != SAVE_VERSION:
+            raise ValueError("不支持的存档版本")
+        game_cls = GAME_TYPES.get(data.get("type"))
+        if game_cls is None:
+            raise ValueError("未知的游戏类型")
+
+        size = data["size"]
+        if not (8 <= size <= 19):
+            raise ValueError("棋盘大小必须在 8-19 之间")
+        grid = bytearray(data["grid"].encode('ascii').translate(_TEXT_TO_GRID))
+        if len(grid) != size * size or grid.translate(None, b"\x00\x01\x02"):
+            raise ValueError("棋盘数据损坏")
+
+        board = Board(size)
+        board.grid = grid
+
+        def on_board(x, y):
+            return type(x) is int and type(y) is int and board.is_valid(x, y)
+
+        current_player = data["current_player"]
+        if current_player not in (1, 2):
+            raise ValueError("存档数据损坏")
+        last_move = data["last_move"]
+        if last_move is not None and not (len(last_move) == 2 and on_board(*last_move)):
+            raise ValueError("存档数据损坏")
+
+        history = []
+        for entry in data["history"]:
+            if entry[0] == "move" and len(entry) == 5:
+                _, x, y, player, captured = entry
+                captured = tuple(tuple(c) for c in captured)
+                if (player not in (1, 2) or not on_board(x, y)
+                        or not all(len(c) == 2 and on_board(*c) for c in captured)):
+                    raise ValueError("存档数据损坏")
+                history.append(("move", x, y, player, captured))
+            elif entry[0] == "pass" and len(entry) == 2 and entry[1] in (1, 2):
+                history.append(("pass", entry[1]))
+            else:
+                raise ValueError("存档数据损坏")
+
+        # 与 pickle 读档走同一恢复路径，由 __setstate__ 补齐派生状态
+        game = game_cls.__new__(game_cls)
+        game.__setstate__({
+            "board": board,
+            "current_player": current_player,
+            "history": history,
+            "last_move": tuple(last_move) if last_move is not None else None,
+        })
+        return game
+
 class GomokuGame(GameBase):
     # 五子棋逻辑实现
+    game_type = 'gomoku'
+    _LINES = {} # 全盘检查用的方向掩码缓存，键为棋盘大小
     
     def check_rules(self, x, y, player):
         # 五子棋无需特殊规则，仅需基础合法性（已在make_move检查）
         pass
 
     def check_winner(self): 
+        # 连五只可能由最后一手形成，只需检查经过该点的四条线
+        if self.last_move is None:
+            return self._scan_winner()
+
         grid = self.board.grid
         size = self.board.size
-        
+        x, y = self.last_move
+        p = grid[x * size + y]
+
         # 检查四个方向：横、竖、左斜、右斜
-        directions = [(0, 1), (1, 0), (1, 1), (1, -1)]
-        
-        for r in range(size):
-            for c in range(size):
-                p = grid[r][c]
-                if p == 0: continue
-                
-                for dr, dc in directions:
-                    count = 1
-                    # 向正方向延伸
-                    tr, tc = r + dr, c + dc
-                    while 0 <= tr < size and 0 <= tc < size and grid[tr][tc] == p:
-                        count += 1
-                        tr += dr
-                        tc += dc
-                    
-                    if count >= 5:
-                        return p # 返回获胜玩家 ID
+        for dr, dc in _LINE_DIRECTIONS:
+            count = 1
+            # 分别向正、反方向各延伸至多 4 格
+            for sr, sc in ((dr, dc), (-dr, -dc)):
+                tr, tc = x + sr, y + sc
+                steps = 0
+                while steps < 4 and 0 <= tr < size and 0 <= tc < size and grid[tr * size + tc] == p:
+                    count += 1
+                    steps += 1
+                    tr += sr
+                    tc += sc
+
+            if count >= 5:
+                return p # 返回获胜玩家 ID
+
+        # 检查是否平局 (棋盘满)
+        if self.empty_count:
+            return 0 # 游戏继续
+        return 3 # 平局
+
+    def _scan_winner(self):
+        # 全盘扫描，仅在不知道最后一手时使用
+        # 每个格子占大整数中的一个字节，一次移位就让全盘格子同时与某方向上的邻格对齐，
+        # 连续 4 次移位相与后仍非零，即存在连五
+        grid = self.board.grid
+        lines = self._line_masks(self.board.size)
+
+        for p in (1, 2):
+            bb = int.from_bytes(grid.translate(_STONE_TABLES[p]), 'little')
+            for shift, mask in lines:
+                run = bb & mask
+                for k in range(1, 5):
+                    run &= bb >> (shift * k)
+                if run:
+                    return p # 返回获胜玩家 ID
 
         # 检查是否平局 (棋盘满)
-        for row in grid:
-            if 0 in row:
-                return 0 # 游戏继续
+        if 0 in grid:
+            return 0 # 游戏继续
         return 3 # 平局
 
+    @classmethod
+    def _line_masks(cls, size):
+        """
+        辅助函数：四个方向各自的 (移位位数, 连五起点掩码)，按棋盘大小缓存
+        掩码只保留能向该方向延伸 5 格而不越界的起点，避免移位跨行回绕
+        """
+        lines = cls._LINES.get(size)
+        if lines is None:
+            lines = []
+            for dr, dc in _LINE_DIRECTIONS:
+                mask = 0
+                for r in range(size):
+                    for c in range(size):
+                        if 0 <= r + 4 * dr < size and 0 <= c + 4 * dc < size:
+                            mask |= 1 << (8 * (r * size + c))
+                lines.append((8 * (dr * size + dc), mask))
+            cls._LINES[size] = lines
+        return lines
+
 class GoGame(GameBase):
     # 围棋逻辑实现
+    # 棋块用并查集 (Union-Find) 增量维护：每个根节点记录所属棋子集合与气的集合，
+    # 落子时只合并/更新相邻棋块，无需每步重新搜索
+    # 局面用 Zobrist 哈希增量维护，打劫判断只需比较整数
+    game_type = 'go'
+
+    def __init__(self, size=15):
+        super().__init__(size)
+        self._rebuild_groups()
+        self._rehash()
+
+    def __getstate__(self):
+        # 并查集与哈希可由棋盘重建，不写入存档
+        state = self.__dict__.copy()
+        for key in ('_adj', '_parent', '_rank', '_stones', '_liberties', 'zhash', '_prev_hash'):
+            state.pop(key, None)
+        return state
+
+    def __setstate__(self, state):
+        super().__setstate__(state)
+        self._rebuild_groups()
+        self._rehash()
 
     def make_move(self, x, y):
         # 重写围棋的落子逻辑，因为涉及提子、打劫和自杀判断
         # 基础检查
+        size = self.board.size
         if not self.board.is_valid(x, y):
             raise InvalidMoveError("坐标超出棋盘范围")
-        if self.board.grid[x][y] != 0:
+        grid = self.board.grid
+        idx = x * size + y
+        if grid[idx] != 0:
             raise InvalidMoveError("此处已有棋子")
 
-        # 模拟落子
-        # 必须在真实落子前模拟，判断是否提子或自杀
-        trial_grid = copy.deepcopy(self.board.grid)
-        trial_grid[x][y] = self.current_player
-        
-        opponent = 3 - self.current_player
-        captured_stones = []
-
-        # 检查邻居对手棋子是否无气 (提子逻辑)
-        neighbors = [(-1, 0), (1, 0), (0, -1), (0, 1)]
-        for dx, dy in neighbors:
-            nx, ny = x + dx, y + dy
-            if self.board.is_valid(nx, ny) and trial_grid[nx][ny] == opponent:
-                # 计算该对手块的气
-                group, liberties = self._get_group_liberties(trial_grid, nx, ny)
-                if liberties == 0:
-                    captured_stones.extend(group)
-        
-        # 执行提子：从模拟棋盘移除
-        for cx, cy in captured_stones:
-            trial_grid[cx][cy] = 0
+        player = self.current_player
+        opponent = 3 - player
+        find = self._find
+        liberties = self._liberties
+        stones = self._stones
+
+        # 按颜色归类相邻点：空位即新子的气，同色/异色记录所在棋块的根
+        empties = set()
+        friend_roots = set()
+        enemy_roots = set()
+        for n in self._adj[idx]:
+            color = grid[n]
+            if color == 0:
+                empties.add(n)
+            elif color == player:
+                friend_roots.add(find(n))
+            else:
+                enemy_roots.add(find(n))
+
+        # 检查邻居对手棋块是否无气 (提子逻辑)：唯一的气就是落子点
+        captured_roots = [r for r in enemy_roots if len(liberties[r]) == 1]
+        captured_stones = [s for r in captured_roots for s in stones[r]]
 
         # 检查自杀 (禁入点)：自己落下后无气，且没有提掉对手
         # 下子时不能下到不合法位置
-        my_group, my_liberties = self._get_group_liberties(trial_grid, x, y)
-        if my_liberties == 0:
+        if not captured_stones and not empties and all(len(liberties[r]) == 1 for r in friend_roots):
             raise InvalidMoveError("禁入点 (自杀操作)")
 
+        # 计算落子后局面的哈希
+        trial_hash = self.zhash ^ _ZOBRIST[idx][player]
+        for s in captured_stones:
+            trial_hash ^= _ZOBRIST[s][opponent]
+
         # 检查全局同型 (打劫 Ko)
-        if self.history and trial_grid == self.history[-1]:
+        # 不提子时棋盘必然多出一子，不可能回到上一步，只需在提子时比较
+        if captured_stones and trial_hash == self._prev_hash:
             # 注意：简单的劫争规则是不能立即回到上一步。
             # 严格来说应该检查整个历史，但基本劫争通常只检查上一步。
             raise InvalidMoveError("全局同型 (打劫禁手)")
 
         # 确认落子合法，应用更改
-        self.history.append(copy.deepcopy(self.board.grid)) # 存旧状态
-        self.board.grid = trial_grid # 应用新状态
+        self.history.append(("move", x, y, player, tuple(divmod(s, size) for s in captured_stones)))
+        grid[idx] = player
+        stones[idx] = {idx}
+        liberties[idx] = empties
+        for r in friend_roots:
+            self._union(idx, r)
+        liberties[find(idx)].discard(idx)
+        for r in enemy_roots:
+            liberties[r].discard(idx)
+
+        # 执行提子
+        for r in captured_roots:
+            self._remove_group(r)
+
+        self._prev_hash = self.zhash
+        self.zhash = trial_hash
+        self.last_move = (x, y)
+        self.empty_count += len(captured_stones) - 1
         self.current_player = opponent # 切换玩家
 
     def check_rules(self, x, y, player):
@@ -169,9 +412,16 @@ class GoGame(GameBase):
     
     def pass_turn(self): 
         # 虚着：不落子，直接切换
-        self.history.append(copy.deepcopy(self.board.grid))
+        self.history.append(("pass", self.current_player))
+        self._prev_hash = self.zhash
         self.current_player = 3 - self.current_player
 
+    def undo(self):
+        super().undo()
+        # 悔棋较少发生，直接按恢复后的棋盘重建并查集 (被提子需重新连成块)
+        self._rebuild_groups()
+        self._rehash()
+
     def check_winner(self):
         """
         围棋终局判断 
@@ -187,36 +437,111 @@ class GoGame(GameBase):
         else:
             return 3 # 平局
 
-    def _get_group_liberties(self, grid, start_x, start_y):
+    def _rebuild_groups(self):
         """
-        辅助函数：计算某一颗棋子所在块(Group)的棋子列表和气的数量
-        使用 BFS/DFS 算法
+        辅助函数：根据当前棋盘重建并查集、棋块棋子集合与气的集合
         """
-        color = grid[start_x][start_y]
-        if color == 0:
-            return [], 0
+        size = self.board.size
+        grid = self.board.grid
+        n = size * size
 
-        stack = [(start_x, start_y)]
-        visited = set() # 记录已访问的同色棋子
-        visited.add((start_x, start_y))
-        
-        liberties = set() # 记录气（空位坐标）
-        group = [(start_x, start_y)]
-
-        while stack:
-            cx, cy = stack.pop()
-            neighbors = [(-1, 0), (1, 0), (0, -1), (0, 1)]
-            for dx, dy in neighbors:
-                nx, ny = cx + dx, cy + dy
-                if not (0 <= nx < self.board.size and 0 <= ny < self.board.size):
-                    continue
-                
-                neighbor_color = grid[nx][ny]
-                if neighbor_color == 0:
-                    liberties.add((nx, ny))
-                elif neighbor_color == color and (nx, ny) not in visited:
-                    visited.add((nx, ny))
-                    stack.append((nx, ny))
-                    group.append((nx, ny))
-        
-        return group, len(liberties)
\ No newline at end of file
+        # 预计算每个点的上下左右相邻点下标
+        adj = []
+        for i in range(n):
+            x, y = divmod(i, size)
+            adj.append(tuple((x + dx) * size + (y + dy) for dx, dy in _NEIGHBORS4
+                             if 0 <= x + dx < size and 0 <= y + dy < size))
+        self._adj = adj
+
+        self._parent = list(range(n))
+        self._rank = [0] * n
+        stones = self._stones = {}
+        liberties = self._liberties = {}
+        for i in range(n):
+            if grid[i]:
+                stones[i] = {i}
+                liberties[i] = set()
+
+        union = self._union
+        for i in range(n):
+            color = grid[i]
+            if color == 0:
+                continue
+            for j in adj[i]:
+                if grid[j] == color:
+                    union(i, j)
+
+        find = self._find
+        for i in range(n):
+            if grid[i]:
+                liberties[find(i)].update(j for j in adj[i] if grid[j] == 0)
+
+    def _rehash(self):
+        """
+        辅助函数：按当前棋盘计算 Zobrist 哈希，并由最后一条历史反推上一步局面的哈希
+        """
+        grid = self.board.grid
+        zhash = 0
+        for i, color in enumerate(grid):
+            if color:
+                zhash ^= _ZOBRIST[i][color]
+        self.zhash = zhash
+
+        if not self.history:
+            self._prev_hash = None
+            return
+        last = self.history[-1]
+        if last[0] == "move":
+            _, x, y, player, captured = last
+            size = self.board.size
+            zhash ^= _ZOBRIST[x * size + y][player]
+            for cx, cy in captured:
+                zhash ^= _ZOBRIST[cx * size + cy][3 - player]
+        self._prev_hash = zhash
+
+    def _find(self, i):
+        # 路径减半
+        parent = self._parent
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def _union(self, a, b):
+        # 按秩合并，同时合并棋子集合与气的集合
+        find = self._find
+        rank = self._rank
+        ra, rb = find(a), find(b)
+        if ra == rb:
+            return ra
+        if rank[ra] < rank[rb]:
+            ra, rb = rb, ra
+        self._parent[rb] = ra
+        if rank[ra] == rank[rb]:
+            rank[ra] += 1
+        self._stones[ra] |= self._stones.pop(rb)
+        self._liberties[ra] |= self._liberties.pop(rb)
+        return ra
+
+    def _remove_group(self, root):
+        # 提走整块棋子，被提的点成为相邻棋块的气
+        grid = self.board.grid
+        parent = self._parent
+        rank = self._rank
+        adj = self._adj
+        liberties = self._liberties
+        find = self._find
+
+        stones = self._stones.pop(root)
+        del liberties[root]
+        for s in stones:
+            grid[s] = 0
+            parent[s] = s
+            rank[s] = 0
+        for s in stones:
+            for n in adj[s]:
+                if grid[n]:
+                    liberties[find(n)].add(s)
+
+# 游戏类型名 -> 游戏类，供新建游戏和读档使用
+GAME_TYPES = {cls.game_type: cls for cls in (GomokuGame, GoGame)}
@@ -1,6 +1,6 @@
 
 import sys
-import os
+import json
 import pickle
 from exceptions import *
 from view import *
@@ -9,12 +9,30 @@ from backend import *
 class GameClient:
     def __init__(self):
         self.game = None 
+        self._game_kind = None # 当前游戏类型名 (game_type)，随 self.game 一起更新
         self.ui_builder = ConsoleUIBuilder()
         self.last_message = "欢迎来到对战平台！请输入 start 或 load 指令开始。"
         self.show_hints = True # 控制提示显示
         # 记录连续虚着次数，用于围棋终局判断
         self.pass_count = 0 
 
+        # 指令分发表：指令名 -> 处理方法，只在初始化时构建一次
+        self._menu_table = {
+            'start': self._menu_start,
+            'load': self._menu_load,
+            'quit': self._menu_quit,
+        }
+        self._cmd_table = {
+            'move': self._cmd_move,
+            'pass': self._cmd_pass,
+            'undo': self._cmd_undo,
+            'resign': self._cmd_resign,
+            'save': self._cmd_save,
+            'restart': self._cmd_restart,
+            'hint': self._cmd_hint,
+            'quit': self._cmd_quit,
+        }
+
     def start(self):
         # 游戏启动入口：负责初始化配置
         while True:
@@ -32,56 +50,62 @@ class GameClient:
                 user_input = input("\n请输入指令 > ").strip().split()
                 if not user_input: continue
                 
-                cmd = user_input[0].lower()
-
-                if cmd == 'start':
-                    if len(user_input) != 3:
-                        raise InvalidCommandError("参数错误。格式: start <game_type> <size>")
-                    
-                    g_type = user_input[1]
-                    try:
-                        size = int(user_input[2])
-                    except ValueError:
-                        raise InvalidCommandError("棋盘大小必须是整数")
-
-                    if g_type == 'gomoku':
-                        self.game = GomokuGame(size)
-                    elif g_type == 'go':
-                        self.game = GoGame(size)
-                    else:
-                        raise InvalidCommandError("未知游戏类型，请输入 gomoku 或 go")
-                    
-                    self.last_message = "游戏开始！"
-                    self.pass_count = 0
-                    self.game_loop() # 进入游戏循环
-
-                elif cmd == 'load': 
-                    if len(user_input) != 2:
-                        raise InvalidCommandError("参数错误。格式: load <filepath>")
-                    self.load_game(user_input[1])
-                    self.game_loop()
-
-                elif cmd == 'quit':
-                    print("再见！")
-                    sys.exit()
-                else:
+                handler = self._menu_table.get(user_input[0].lower())
+                if handler is None:
                     self.last_message = "无效指令，请参考上方菜单。"
+                else:
+                    handler(user_input)
 
             except Exception as e:
                 self.last_message = f"错误: {str(e)}"
 
+    def _menu_start(self, user_input):
+        if len(user_input) != 3:
+            raise InvalidCommandError("参数错误。格式: start <game_type> <size>")
+        
+        g_type = user_input[1]
+        try:
+            size = int(user_input[2])
+        except ValueError:
+            raise InvalidCommandError("棋盘大小必须是整数")
+
+        game_cls = GAME_TYPES.get(g_type)
+        if game_cls is None:
+            raise InvalidCommandError("未知游戏类型，请输入 gomoku 或 go")
+        self.game = game_cls(size)
+        self._game_kind = game_cls.game_type
+        
+        self.last_message = "游戏开始！"
+        self.pass_count = 0
+        self.game_loop() # 进入游戏循环
+
+    def _menu_load(self, user_input):
+        if len(user_input) != 2:
+            raise InvalidCommandError("参数错误。格式: load <filepath>")
+        self.load_game(user_input[1])
+        self.game_loop()
+
+    def _menu_quit(self, user_input):
+        print("再见！")
+        sys.exit()
+
     def game_loop(self):
         # 游戏主循环
+        last_frame_key = None # 上一帧的画面内容，未变化时不重绘
         while True:
             # 渲染界面 
-            self.ui_builder\
-                .add_board(self.game.board.grid)\
-                .add_info(self.game.current_player, self.last_message)
-            
-            if self.show_hints: # 可选显示提示
-                self.ui_builder.add_help()
-            
-            self.ui_builder.build_and_show()
+            frame_key = (bytes(self.game.board.grid), self.game.current_player,
+                         self.last_message, self.show_hints)
+            if frame_key != last_frame_key:
+                self.ui_builder\
+                    .add_board(self.game.board.grid, self.game.board.size)\
+                    .add_info(self.game.current_player, self.last_message)
+                
+                if self.show_hints: # 可选显示提示
+                    self.ui_builder.add_help()
+                
+                self.ui_builder.build_and_show()
+                last_frame_key = frame_key
 
             # 检查胜负状态 (在渲染后检查，确保用户看到最后一步)
             winner = self.check_game_over()
@@ -91,9 +115,9 @@ class GameClient:
                 return # 退出该函数，返回 start() 的循环
 
             # 获取并处理指令
-            user_input = input("指令 > ").strip().lower()
+            parts = input("指令 > ").lower().split()
             try:
-                self.handle_input(user_input)
+                self.handle_input(parts)
                 # 如果没报错，说明操作成功（除了一些特定指令外，重置消息）
                 # if not self.last_message.startswith("操作成功"):
                 #    self.last_message = "操作成功"
@@ -104,83 +128,83 @@ class GameClient:
             except Exception as e:
                 self.last_message = f"未知错误: {str(e)}"
 
-    def handle_input(self, user_input):
-        parts = user_input.split()
+    def handle_input(self, parts):
+        # parts 为已按空白切分的指令
         if not parts: return
-        cmd = parts[0]
+        handler = self._cmd_table.get(parts[0])
+        if handler is None:
+            raise InvalidCommandError("未知指令，输入 hint 查看帮助")
+        handler(parts)
 
-        # 落子指令
-        if cmd == 'move': 
-            if len(parts) != 3:
-                raise InvalidCommandError("格式错误。应为: move <row> <col>")
-            try:
-                x, y = int(parts[1]), int(parts[2])
-            except ValueError:
-                raise InvalidCommandError("坐标必须为整数")
-            
-            self.game.make_move(x, y)
-            self.pass_count = 0 # 落子后重置虚着计数
-            self.last_message = "落子成功"
-
-        # 围棋虚着
-        elif cmd == 'pass': 
-            if isinstance(self.game, GoGame):
-                self.game.pass_turn()
-                self.pass_count += 1
-                self.last_message = "当前玩家选择虚着 (Pass)"
-            else:
-                raise InvalidCommandError("只有围棋可以虚着")
-
-        # 悔棋
-        elif cmd == 'undo': 
-            self.game.undo()
-            self.pass_count = 0 # 悔棋可能会破坏连续虚着状态，简单起见重置
-            self.last_message = "悔棋成功"
-
-        # 认负
-        elif cmd == 'resign': 
-            # 认负直接判对方胜
-            winner_id = 3 - self.game.current_player
-            winner_str = "黑方" if winner_id == 1 else "白方"
-            
-            # 构建胜负消息
-            self.last_message = f"{winner_str} 获胜 (对方认负)"
-            
-            # 显示最终结果
-            print(f"\n=== {self.last_message} ===")
-            input("按回车键返回主菜单...")
-            
-            # 使用 StopIteration 跳出 game_loop
-            raise StopIteration("游戏结束")
-
-        # 存档
-        elif cmd == 'save': 
-            if len(parts) != 2:
-                raise InvalidCommandError("格式: save <filename>")
-            self.game.save_game(parts[1])
-            self.last_message = f"游戏已保存至 {parts[1]}"
-
-        # 重新开始
-        elif cmd == 'restart': 
-            # 保留原配置重新开局
-            size = self.game.board.size
-            game_type = type(self.game)
-            self.game = game_type(size)
-            self.pass_count = 0
-            self.last_message = "游戏已重置"
+    # 落子指令
+    def _cmd_move(self, parts):
+        if len(parts) != 3:
+            raise InvalidCommandError("格式错误。应为: move <row> <col>")
+        try:
+            x, y = int(parts[1]), int(parts[2])
+        except ValueError:
+            raise InvalidCommandError("坐标必须为整数")
+        
+        self.game.make_move(x, y)
+        self.pass_count = 0 # 落子后重置虚着计数
+        self.last_message = "落子成功"
 
-        # 界面控制
-        elif cmd == 'hint': 
-            self.show_hints = not self.show_hints
-            self.last_message = f"提示已{'显示' if self.show_hints else '隐藏'}"
+    # 围棋虚着
+    def _cmd_pass(self, parts):
+        if self._game_kind == 'go':
+            self.game.pass_turn()
+            self.pass_count += 1
+            self.last_message = "当前玩家选择虚着 (Pass)"
+        else:
+            raise InvalidCommandError("只有围棋可以虚着")
 
-        elif cmd == 'quit': 
-            # 这里是返回主菜单
-            self.last_message = "已返回主菜单"
-            raise StopIteration("返回主菜单") # 借用异常跳出
+    # 悔棋
+    def _cmd_undo(self, parts):
+        self.game.undo()
+        self.pass_count = 0 # 悔棋可能会破坏连续虚着状态，简单起见重置
+        self.last_message = "悔棋成功"
 
-        else:
-            raise InvalidCommandError("未知指令，输入 hint 查看帮助")
+    # 认负
+    def _cmd_resign(self, parts):
+        # 认负直接判对方胜
+        winner_id = 3 - self.game.current_player
+        winner_str = "黑方" if winner_id == 1 else "白方"
+        
+        # 构建胜负消息
+        self.last_message = f"{winner_str} 获胜 (对方认负)"
+        
+        # 显示最终结果
+        print(f"\n=== {self.last_message} ===")
+        input("按回车键返回主菜单...")
+        
+        # 使用 StopIteration 跳出 game_loop
+        raise StopIteration("游戏结束")
+
+    # 存档
+    def _cmd_save(self, parts):
+        if len(parts) != 2:
+            raise InvalidCommandError("格式: save <filename>")
+        self.game.save_game(parts[1])
+        self.last_message = f"游戏已保存至 {parts[1]}"
+
+    # 重新开始
+    def _cmd_restart(self, parts):
+        # 保留原配置重新开局
+        size = self.game.board.size
+        game_type = type(self.game)
+        self.game = game_type(size)
+        self.pass_count = 0
+        self.last_message = "游戏已重置"
+
+    # 界面控制
+    def _cmd_hint(self, parts):
+        self.show_hints = not self.show_hints
+        self.last_message = f"提示已{'显示' if self.show_hints else '隐藏'}"
+
+    def _cmd_quit(self, parts):
+        # 这里是返回主菜单
+        self.last_message = "已返回主菜单"
+        raise StopIteration("返回主菜单") # 借用异常跳出
 
     def check_game_over(self):
         # 检查游戏是否结束
@@ -189,7 +213,7 @@ class GameClient:
         # 情况1: 五子棋连珠 (每次落子后 backend 可能会计算，或者在这里调用)
         # 情况2: 围棋双虚着
         
-        if isinstance(self.game, GoGame):
+        if self._game_kind == 'go':
             # 双方均决定不落子(连续两次Pass)时判胜负
             if self.pass_count >= 2:
                 winner_id = self.game.check_winner()
@@ -211,19 +235,25 @@ class GameClient:
         # 读取存档逻辑
         try:
             with open(filepath, 'rb') as f:
-                loaded_game = pickle.load(f)
-                if not isinstance(loaded_game, GameBase):
-                    raise ValueError("文件内容损坏或不是有效的游戏存档")
-                self.game = loaded_game
-                self.pass_count = 0
-                self.last_message = "存档读取成功"
+                data = f.read()
+            if data[:1] == b'{':
+                loaded_game = GameBase.from_snapshot(json.loads(data))
+            else:
+                # 旧版 pickle 存档
+                loaded_game = pickle.loads(data)
+            if not isinstance(loaded_game, GameBase):
+                raise ValueError("文件内容损坏或不是有效的游戏存档")
+            self.game = loaded_game
+            self._game_kind = loaded_game.game_type
+            self.pass_count = 0
+            self.last_message = "存档读取成功"
         except FileNotFoundError:
             raise GameStateError("找不到指定的存档文件")
         except Exception as e:
             raise GameStateError(f"读取失败: {str(e)}")
 
     def _clear_screen(self):
-        os.system('cls' if os.name == 'nt' else 'clear')
+        clear_screen()
     
 if __name__ == "__main__":
     try:
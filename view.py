@@ -1,39 +1,102 @@
 
 from abc import ABC, abstractmethod
+from functools import lru_cache
+import os
+import sys
+
+def _enable_vt_mode():
+    # 在 Windows 控制台现有输出模式上追加 ENABLE_VIRTUAL_TERMINAL_PROCESSING，
+    # 旧版控制台不支持时返回 False
+    import ctypes
+    from ctypes import wintypes
+    kernel32 = ctypes.windll.kernel32
+    handle = kernel32.GetStdHandle(-11) # STD_OUTPUT_HANDLE
+    mode = wintypes.DWORD()
+    if not kernel32.GetConsoleMode(handle, ctypes.byref(mode)):
+        return False
+    return bool(kernel32.SetConsoleMode(handle, mode.value | 0x0004))
+
+# 清屏转义序列 (清屏 + 光标归位)：直接写入终端，避免每帧启动子进程
+# 设置了 NO_COLOR、终端不支持 ANSI 或无法开启 Windows VT 模式时退回系统清屏命令
+if os.environ.get('NO_COLOR') or os.environ.get('TERM') == 'dumb':
+    _CLEAR = None
+elif os.name == 'nt' and not _enable_vt_mode():
+    _CLEAR = None
+else:
+    _CLEAR = "\x1b[2J\x1b[H"
+
+def clear_screen():
+    if _CLEAR is None:
+        os.system('cls' if os.name == 'nt' else 'clear')
+    else:
+        sys.stdout.write(_CLEAR)
+        sys.stdout.flush()
+
+# 棋子字符查找表：0 空 '.', 1 黑 'X', 2 白 'O'
+_CELL_CHARS = bytes.maketrans(b"\x00\x01\x02", b".XO")
+
+# 预先格式化好的两位坐标，覆盖任意合理的棋盘大小
+_IDX = tuple(f"{i:2d}" for i in range(64))
+
+@lru_cache(maxsize=32)
+def _header(n):
+    # 列坐标表头只与棋盘大小有关
+    return "   " + " ".join(_IDX[:n])
 
 class UIComponent(ABC):
     @abstractmethod
-    def render(self) -> list[str]:
+    def render(self, sink: list[str]) -> None:
+        # 将本组件的各行追加到共享的 sink 中
         pass
 
 class BoardComponent(UIComponent):
-    def __init__(self, board_grid):
+    def __init__(self, board_grid, size):
         self.grid = board_grid
+        self.size = size
     
-    def render(self):
-        lines = []
-        # 将二维数组转换为字符图形
-        lines.append("   " + " ".join([f"{i:2d}" for i in range(len(self.grid))]))
-        for idx, row in enumerate(self.grid):
-            row_str = " ".join([" ." if c==0 else (" X" if c==1 else " O") for c in row])
-            lines.append(f"{idx:2d} {row_str}")
-        return lines
+    def render(self, sink):
+        size = self.size
+        # 查表把整个一维棋盘一次转换为字符，再按行切片
+        chars = self.grid.translate(_CELL_CHARS).decode('ascii')
+        sink.append(_header(size))
+        # 每格占两列 (" X")，格间以空格分隔
+        sink.extend(_IDX[idx] + "  " + "  ".join(chars[idx * size:(idx + 1) * size]) for idx in range(size))
 
 class InfoComponent(UIComponent):
     def __init__(self, current_player, msg):
         self.player = "黑方" if current_player == 1 else "白方"
         self.msg = msg
 
-    def render(self):
-        return [f"当前行动: {self.player}", f"系统提示: {self.msg}"]
+    def render(self, sink):
+        sink.append(f"当前行动: {self.player}")
+        sink.append(f"系统提示: {self.msg}")
+
+class HelpComponent(UIComponent):
+    # 使用简单的文本组件渲染操作指南
+    HELP_MSG = (
+        "操作指南:",
+        "  move <x> <y> : 落子 (例: move 7 7)",
+        "  pass         : 虚着 (仅围棋)",
+        "  undo         : 悔棋",
+        "  resign       : 认负",
+        "  save <file>  : 存档",
+        "  restart      : 重新开始",
+        "  hint         : 隐藏/显示此提示",
+        "  quit         : 返回主菜单"
+    )
+
+    def render(self, sink):
+        sink.extend(self.HELP_MSG)
+
+_HELP = HelpComponent()
 
 class ConsoleUIBuilder:
     # UI建造者：负责组装不同的组件
     def __init__(self):
         self.components = []
 
-    def add_board(self, board_grid):
-        self.components.append(BoardComponent(board_grid))
+    def add_board(self, board_grid, size):
+        self.components.append(BoardComponent(board_grid, size))
         return self
 
     def add_info(self, player, msg):
@@ -41,29 +104,20 @@ class ConsoleUIBuilder:
         return self
 
     def build_and_show(self):
-        import os
-        os.system('cls' if os.name == 'nt' else 'clear') # 清屏
+        # 整帧拼成一个字符串 (连同清屏序列) 一次写出，避免逐行 print
+        sink = []
         for comp in self.components:
-            for line in comp.render():
-                print(line)
-            print("-" * 20)
+            comp.render(sink)
+            sink.append("-" * 20)
+        frame = "\n".join(sink) + "\n"
+        if _CLEAR is None:
+            clear_screen()
+        else:
+            frame = _CLEAR + frame
+        sys.stdout.write(frame)
+        sys.stdout.flush()
         self.components = [] # 重置
     def add_help(self):
-        help_msg = [
-            "操作指南:",
-            "  move <x> <y> : 落子 (例: move 7 7)",
-            "  pass         : 虚着 (仅围棋)",
-            "  undo         : 悔棋",
-            "  resign       : 认负",
-            "  save <file>  : 存档",
-            "  restart      : 重新开始",
-            "  hint         : 隐藏/显示此提示",
-            "  quit         : 返回主菜单"
-        ]
-        # 使用简单的文本组件渲染
-        class HelpComponent:
-            def render(self):
-                return help_msg
-        
-        self.components.append(HelpComponent())
+        # 帮助内容固定不变，复用同一个组件实例
+        self.components.append(_HELP)
         return self
\ No newline at end of file